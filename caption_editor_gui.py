@@ -1,19 +1,101 @@
 import os
+import re
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 from PIL import Image, ImageTk
+import imagesize
 import zipfile
+import shutil
 from typing import Dict, Tuple
 import openai
 import base64
+import io
+import mmap
 from tqdm import tqdm
 import logging
 import threading
 import queue
+from multiprocessing import Pool
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import time
 import json
+import tempfile
+import hashlib
+import sqlite3
 from datetime import datetime
 
+logging.basicConfig(
+    filename='caption_debug.log',
+    level=logging.DEBUG,
+    format='%(asctime)s - %(message)s',
+    filemode='a'  # Append mode instead of write
+)
+_log = logging.getLogger(__name__)
+
+_IMG_EXTS = frozenset({'png', 'jpg', 'jpeg', 'webp'})
+
+def _is_image_name(name):
+    """Match the extension by hash lookup, lowercasing only the few characters after the dot"""
+    _, dot, ext = name.rpartition('.')
+    return bool(dot) and ext.lower() in _IMG_EXTS
+
+# Label prefixes the model sometimes puts in front of the caption
+_PREFIX_RE = re.compile(
+    r'^(?:caption(?: for(?: the)? image| for art training dataset| for image training)?'
+    r'|description|generated caption|image caption|final caption|suggested caption)\s*:\s*',
+    re.IGNORECASE
+)
+# Caption wrapped in a matching pair of single or double quotes
+_QUOTE_RE = re.compile(r'^([\'"])(.*)\1$', re.DOTALL)
+
+def _thumb_matches_source(cache_path, source_size, size):
+    """Check a cached thumbnail against the source dimensions using header-only reads"""
+    thumb_w, thumb_h = imagesize.get(cache_path)
+    src_w, src_h = source_size
+    if thumb_w <= 0 or thumb_h <= 0 or thumb_w > size[0] or thumb_h > size[1]:
+        return False
+    if src_w <= 0 or src_h <= 0:
+        return True  # Source format unknown to imagesize, trust the key
+    # Aspect ratio must agree within the rounding of one pixel
+    return abs(thumb_w * src_h - thumb_h * src_w) <= max(src_w, src_h)
+
+def _decode_thumb(path, size, cache_dir):
+    """Decode and shrink one image in a worker process, returning raw pixels for Tk"""
+    try:
+        # Thumbnails are deterministic, so reuse one made from the same file version
+        source_size = imagesize.get(path)
+        key = hashlib.sha1(
+            f"{path}:{os.path.getmtime(path)}:{source_size}:{size}".encode('utf-8')
+        ).hexdigest()
+        cache_path = os.path.join(cache_dir, key + ".png")
+        image = None
+        if os.path.exists(cache_path) and _thumb_matches_source(cache_path, source_size, size):
+            try:
+                image = Image.open(cache_path)
+                image.load()
+            except OSError:
+                # A valid header says nothing about the rest of the file, rebuild it
+                image = None
+                os.remove(cache_path)
+        if image is None:
+            image = Image.open(path)
+            if image.format == "JPEG":
+                # Let the decoder skip detail we throw away anyway
+                image.draft("RGB", (size[0] * 2, size[1] * 2))
+            image.thumbnail(size, Image.BILINEAR)  # Lanczos is wasted on small previews
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            # Write aside and rename, so a killed process never leaves a half-written cache file
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            image.save(tmp_path, "PNG", optimize=True)
+            os.replace(tmp_path, cache_path)
+        return path, image.tobytes(), image.size, image.mode
+    except Exception as e:
+        print(f"Error loading {path}: {e}")
+        return path, None, None, None
+
 class CaptionEditorApp:
     def __init__(self, root):
         self.root = root
@@ -25,20 +107,52 @@ class CaptionEditorApp:
         # Configuration
         self.images_dir = "images"
         self.captions_dir = "captions"
+        self._cap_dir_sep = self.captions_dir + os.sep
         self.thumbnail_size = (200, 200)
+        self.thumbnail_cache_dir = ".thumbs"
+        self.row_overscan = 2  # Rows built beyond the visible area
+        self.thumbnail_keep_rows = 10  # Rows away from view before a thumbnail is released
         self.progress_file = "caption_progress.json"
+        self.b64_cache_path = "b64_cache.sqlite"
+        self.upload_size = (512, 512)  # Low detail mode never looks past 512px
+        self.upload_quality = 85
+        self.zip_buffer_size = 1024 * 1024  # Read images into the archive in 1 MiB chunks
+        self.zip_prefetch = 4  # Images read ahead while the previous one is written
+        self.zip_prefetch_limit = 64 * 1024 * 1024  # Larger images are streamed, not prefetched
+        self.model = "gpt-4o"
+        self.batch_poll_interval = 30  # Seconds between Batch API status checks
+        self.max_concurrency = 8  # In-flight API requests for "Generate All"
+        self.max_retries = 5  # Attempts per image when rate limited
+        self.requests_per_minute = 500  # OpenAI RPM limit for the account tier
+        self.system_prompt = (
+            "You are a caption generator that follows instructions precisely. "
+            "Output ONLY the raw caption text. "
+            "DO NOT add any prefixes, quotes, or formatting."
+        )
         
         # Style constants
         self.ACTIVE_BORDER_COLOR = "#2ecc71"  # Bright green
         self.INACTIVE_BORDER_COLOR = "#e0e0e0"  # Light gray
         self.BORDER_WIDTH = 2
+        self.ROW_PADY = 5
         
         # Queue for thread communication
         self.caption_queue = queue.Queue()
+        self._draining = False  # check_caption_queue is running (dialogs spin a nested event loop)
+        self._drain_again = False  # Messages arrived while it was running
         
         # Control flags
         self.processing = False
         self.should_stop = False
+        self.exporting = False
+        self._close_after_export = False
+        
+        # Rate limiting shared by all in-flight requests
+        self._next_request_time = 0.0
+        
+        # Persistent cache of encoded images and API results
+        self._cache_lock = threading.Lock()
+        self._cache_db = self.open_cache()
         
         # Initialize OpenAI
         self.openai_key = os.getenv("OPENAI_API_KEY")
@@ -47,13 +161,26 @@ class CaptionEditorApp:
         
         # Store references to avoid garbage collection
         self.thumbnail_refs = {}
-        self.caption_widgets = {}
-        self.caption_frames = {}
+        self.visible_rows = {}  # img_file -> pooled row widgets currently showing it
+        self.free_rows = []  # Pooled rows not bound to any image
+        self.pending_thumbnails = set()
+        self.failed_thumbnails = set()
+        self.thumbnail_pool = None
+        self._thumbnail_poll_scheduled = False
+        self._visible_update_scheduled = False
+        self._pending_scroll = 0
+        self._scroll_scheduled = False
+        self.caption_widgets = {}  # Text widgets of the rows currently on screen
+        self._caption_paths = {}  # img_file -> caption .txt path, computed once per image
         self.original_captions = {}
+        self._dirty = set()  # Rows whose Text widget was edited since the last save
+        self._edited_captions = {}  # Unsaved edits of dirty rows that scrolled out of view
         self.current_active_frame = None
         
         # Progress tracking
-        self.completed_files = self.load_progress()
+        self.digest_to_file = {}  # Image content sha1 -> file whose caption it shares
+        self.completed_files = set()  # Filled from the caption files on disk in load_content
+        self.load_progress()
         
         # Bind window close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -66,13 +193,11 @@ class CaptionEditorApp:
         self.scrollbar = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL, command=self.canvas.yview)
         self.scrollable_frame = ttk.Frame(self.canvas)
         
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
+        self.scrollable_frame.bind("<Configure>", self._on_frame_configure)
+        self.canvas.bind("<Configure>", lambda e: self.schedule_visible_update())
         
         self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.configure(yscrollcommand=self._on_canvas_scroll)
         
         # Pack scrollbar and canvas
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -119,7 +244,19 @@ class CaptionEditorApp:
             text="Generate All Captions", 
             command=self.generate_captions
         )
-        self.generate_btn.pack(pady=5)
+        self.generate_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        self.regenerate_btn = ttk.Button(
+            generate_frame,
+            text="Regenerate All",
+            command=self.regenerate_captions
+        )
+        self.regenerate_btn.pack(side=tk.LEFT, padx=5, pady=5)
+        self.batch_btn = ttk.Button(
+            generate_frame,
+            text="Generate All (Batch API)",
+            command=self.generate_captions_batch
+        )
+        self.batch_btn.pack(side=tk.LEFT, padx=5, pady=5)
         
         # Images and captions container
         self.images_frame = ttk.Frame(self.scrollable_frame)
@@ -131,7 +268,8 @@ class CaptionEditorApp:
         
         ttk.Button(bottom_frame, text="Clear All", command=self.clear_all_captions).pack(side=tk.LEFT, padx=5)
         ttk.Button(bottom_frame, text="Save Changes", command=self.save_changes).pack(side=tk.LEFT, padx=5)
-        ttk.Button(bottom_frame, text="Export Zip", command=self.export_zip).pack(side=tk.LEFT, padx=5)
+        self.export_btn = ttk.Button(bottom_frame, text="Export Zip", command=self.export_zip)
+        self.export_btn.pack(side=tk.LEFT, padx=5)
         
         # Progress bar and status label
         self.progress_frame = ttk.Frame(root)
@@ -151,8 +289,8 @@ class CaptionEditorApp:
         # Load images and captions
         self.load_content()
         
-        # Start checking for caption updates
-        self.check_caption_queue()
+        # Worker threads wake the Tk loop only when they post a message
+        self.root.bind("<<CaptionQueue>>", lambda e: self.check_caption_queue())
 
     def load_system_prompt(self):
         """Load prompt template from file"""
@@ -191,11 +329,7 @@ class CaptionEditorApp:
                 return
                 
             prompt_data = {
-                "system_prompt": (
-                    "You are a caption generator that follows instructions precisely. "
-                    "Output ONLY the raw caption text. "
-                    "DO NOT add any prefixes, quotes, or formatting."
-                ),
+                "system_prompt": self.system_prompt,
                 "user_prompt": self.user_prompt.get("1.0", tk.END.strip())
             }
             
@@ -210,114 +344,234 @@ class CaptionEditorApp:
 
     def on_closing(self):
         """Handle window close event"""
+        if self.exporting:
+            # Killing the export thread would leave a truncated zip behind
+            if messagebox.askokcancel("Quit", "A zip export is in progress. Close the window once it has finished?"):
+                self._close_after_export = True
+            return
         if self.processing:
             if messagebox.askokcancel("Quit", "Caption generation is in progress. Do you want to stop and quit?"):
                 self.should_stop = True
-                self.root.after(1000, self.root.destroy)  # Give time for thread to clean up
+                self.root.after(1000, self.shutdown)  # Give time for thread to clean up
         else:
-            self.root.destroy()
+            self.shutdown()
+
+    def shutdown(self):
+        """Release resources and close the window"""
+        if self.thumbnail_pool:
+            self.thumbnail_pool.terminate()
+        with self._cache_lock:
+            self._cache_db.close()
+        self.root.destroy()
+
+    def open_cache(self):
+        """Open (and create if needed) the sqlite cache shared by worker threads"""
+        db = sqlite3.connect(self.b64_cache_path, check_same_thread=False)
+        with db:
+            db.execute("CREATE TABLE IF NOT EXISTS b64_cache (sha1 BLOB PRIMARY KEY, b64 TEXT)")
+            db.execute("CREATE TABLE IF NOT EXISTS caption_cache (key BLOB PRIMARY KEY, caption TEXT)")
+        return db
+
+    def cache_get(self, query, key):
+        """Run a single-value cache lookup, returning None on a miss"""
+        with self._cache_lock:
+            row = self._cache_db.execute(query, (key,)).fetchone()
+        return row[0] if row else None
+
+    def cache_put(self, table, key, value):
+        """Store a value in a cache table, replacing any previous entry"""
+        with self._cache_lock, self._cache_db:
+            self._cache_db.execute(f"INSERT OR REPLACE INTO {table} VALUES (?, ?)", (key, value))
 
     def set_active_frame(self, img_file):
         """Highlight the currently active frame and reset the previous one"""
         if self.current_active_frame:
             # Reset previous frame
-            prev_frame = self.caption_frames.get(self.current_active_frame)
-            if prev_frame:
-                prev_frame.configure(
-                    highlightcolor=self.INACTIVE_BORDER_COLOR,
-                    highlightbackground=self.INACTIVE_BORDER_COLOR
-                )
+            prev_row = self.visible_rows.get(self.current_active_frame)
+            if prev_row:
+                self.set_row_highlight(prev_row, False)
         
         # Set new active frame
-        new_frame = self.caption_frames.get(img_file)
-        if new_frame:
-            new_frame.configure(
-                highlightcolor=self.ACTIVE_BORDER_COLOR,
-                highlightbackground=self.ACTIVE_BORDER_COLOR
-            )
-            # Ensure the active frame is visible
-            new_frame.update_idletasks()
-            self.canvas.yview_moveto(new_frame.winfo_y() / self.scrollable_frame.winfo_height())
+        new_row = self.visible_rows.get(img_file)
+        if new_row:
+            self.set_row_highlight(new_row, True)
+        if img_file in self.image_index:
+            # Ensure the active row is visible, it is bound to a pooled row once scrolled to.
+            # Callers flush pending layout first, so the offsets below are current
+            y = self.rows_container.winfo_y() + self.image_index[img_file] * self.row_stride
+            self.canvas.yview_moveto(y / self.scrollable_frame.winfo_height())
         
         self.current_active_frame = img_file
 
+    def clear_active_frame(self):
+        """Remove the active highlight, if any"""
+        if self.current_active_frame:
+            row = self.visible_rows.get(self.current_active_frame)
+            if row:
+                self.set_row_highlight(row, False)
+            self.current_active_frame = None
+
+    def set_row_highlight(self, row, active):
+        """Set the border colour of a pooled row"""
+        color = self.ACTIVE_BORDER_COLOR if active else self.INACTIVE_BORDER_COLOR
+        row['frame'].configure(highlightcolor=color, highlightbackground=color)
+
     def check_caption_queue(self):
-        """Check for completed captions and update the GUI"""
+        """Drain pending messages and apply them to the GUI in one pass"""
+        # A dialog below runs a nested event loop that can fire this again; the
+        # outer call picks those messages up once its dialogs are closed
+        if self._draining:
+            self._drain_again = True
+            return
+        self._draining = True
         try:
-            while True:  # Process all available messages
-                msg_type, data = self.caption_queue.get_nowait()
-                
-                if msg_type == "UPDATE_GUI":
-                    # Update caption widget
-                    img_file = data['img_file']
-                    caption = data['caption']
-                    if img_file in self.caption_widgets:
-                        widget = self.caption_widgets[img_file]
-                        widget.delete('1.0', tk.END)
-                        widget.insert('1.0', caption)
-                        self.original_captions[img_file] = caption
-                        
-                        # Update completed files and progress
-                        self.completed_files = data['completed_files']
-                        self.completed_images = len(self.completed_files)
-                        progress = (self.completed_images / data['total']) * 100
-                        
-                        # Update progress display
-                        self.progress_var.set(progress)
-                        self.status_label.config(
-                            text=f"Processing: {self.completed_images}/{data['total']}"
-                        )
-                        
-                        # Highlight current frame
-                        self.set_active_frame(img_file)
-                        
-                        # Force GUI updates
-                        widget.update_idletasks()
-                        self.status_label.update_idletasks()
-                        self.progress_bar.update_idletasks()
-                        self.progress_frame.update_idletasks()
-                        self.root.update_idletasks()
-                    
-                elif msg_type == "DONE":
-                    print("Processing complete")
-                    self.progress_frame.pack_forget()
-                    self.processing = False
-                    self.generate_btn.configure(state="normal")
-                    if self.current_active_frame:
-                        self.caption_frames[self.current_active_frame].configure(
-                            highlightcolor=self.INACTIVE_BORDER_COLOR,
-                            highlightbackground=self.INACTIVE_BORDER_COLOR
-                        )
-                        self.current_active_frame = None
-                    messagebox.showinfo("Success", "Caption generation complete!")
-                    return
-                    
-                elif msg_type == "ERROR":
-                    messagebox.showerror("Error", data)
-                    
-                elif msg_type == "STATUS":
-                    self.status_label.config(text=data)
-                    self.status_label.update_idletasks()
-                    
+            self._apply_queued_messages()
+        finally:
+            self._draining = False
+        if self._drain_again:
+            self._drain_again = False
+            self.root.after_idle(self.check_caption_queue)
+
+    def _apply_queued_messages(self):
+        """Apply every queued message, then show the dialogs they asked for"""
+        messages = []
+        try:
+            while True:  # Collect all available messages
+                messages.append(self.caption_queue.get_nowait())
         except queue.Empty:
             pass
-            
-        # Schedule next check
-        self.root.after(100, self.check_caption_queue)
+        
+        status = None
+        progress = None
+        last_updated = None
+        done = False
+        stopped = False
+        errors = []
+        notices = []  # (dialog function, title, message) shown once state is applied
+        for msg_type, data in messages:
+            if msg_type == "UPDATE_GUI":
+                # Update caption widget
+                img_file = data['img_file']
+                caption = data['caption']
+                self.original_captions[img_file] = caption
+                self._edited_captions.pop(img_file, None)
+                self._dirty.discard(img_file)
+                if img_file in self.caption_widgets:
+                    widget = self.caption_widgets[img_file]
+                    widget.delete('1.0', tk.END)
+                    widget.insert('1.0', caption)
+                    widget.edit_modified(False)
+                # Follow generation even to rows that are not on screen yet
+                last_updated = img_file
+                
+                # Only the latest progress matters for display
+                self.completed_files = data['completed_files']
+                self.completed_images = len(self.completed_files)
+                progress = (self.completed_images / data['total']) * 100
+                status = f"Processing: {self.completed_images}/{data['total']}"
+                
+            elif msg_type == "DONE":
+                done = True
+                
+            elif msg_type == "STOPPED":
+                done = stopped = True
+                
+            elif msg_type == "ERROR":
+                errors.append(data)
+                
+            elif msg_type == "STATUS":
+                status = data
+                
+            elif msg_type == "EXPORT_PROGRESS":
+                # Generation owns the progress bar while it is running
+                if not self.processing:
+                    progress = (data['done'] / data['total']) * 100
+                    status = f"Exporting: {data['done']}/{data['total']}"
+                
+            elif msg_type == "EXPORT_DONE":
+                self.exporting = False
+                self.export_btn.configure(state="normal")
+                if not self.processing:
+                    self.progress_frame.pack_forget()
+                if data['error'] is None and self._close_after_export:
+                    pass  # Closing now, as the user asked, so skip the success dialog
+                elif data['error'] is None:
+                    notices.append((messagebox.showinfo, "Success", f"Dataset exported to {data['zip_name']}"))
+                else:
+                    notices.append((messagebox.showerror, "Error", f"Failed to create zip file: {data['error']}"))
+                
+            elif msg_type == "THUMBNAIL":
+                img_file = data['img_file']
+                self.pending_thumbnails.discard(img_file)
+                if data['data'] is None:
+                    self.failed_thumbnails.add(img_file)
+                elif self.is_row_near_view(self.image_index[img_file]):
+                    image = Image.frombytes(data['mode'], data['size'], data['data'])
+                    photo = ImageTk.PhotoImage(image)
+                    self.thumbnail_refs[img_file] = photo
+                    row = self.visible_rows.get(img_file)
+                    if row:
+                        row['thumbnail'].configure(image=photo)
+        
+        # Update progress display once per tick
+        if progress is not None:
+            self.progress_var.set(progress)
+        if status is not None:
+            self.status_label.config(text=status)
+        if messages:
+            self.progress_frame.update_idletasks()
+        
+        # Highlight only the most recently updated frame, scrolling after the one flush above
+        if last_updated:
+            self.set_active_frame(last_updated)
+        
+        if done:
+            print("Processing complete")
+            self.save_progress()
+            self.progress_frame.pack_forget()
+            self.processing = False
+            self.generate_btn.configure(state="normal")
+            self.batch_btn.configure(state="normal")
+            self.regenerate_btn.configure(state="normal")
+            self.clear_active_frame()
+            if not stopped:
+                notices.append((messagebox.showinfo, "Success", "Caption generation complete!"))
+        
+        # One dialog for a burst of failures instead of a stack of them
+        if errors:
+            shown = "\n".join(errors[:10])
+            if len(errors) > 10:
+                shown += f"\n... and {len(errors) - 10} more"
+            messagebox.showerror("Error", shown)
+        for show, title, message in notices:
+            show(title, message)
+        
+        # Deferred close requested while the export was still running
+        if self._close_after_export and not self.exporting:
+            self._close_after_export = False
+            self.root.after_idle(self.on_closing)
 
-    def load_progress(self) -> set:
+    def _post(self, msg_type, data):
+        """Queue a message for the Tk thread and wake it up; safe to call from any thread"""
+        self.caption_queue.put((msg_type, data))
+        try:
+            self.root.event_generate("<<CaptionQueue>>", when="tail")
+        except (RuntimeError, tk.TclError):
+            pass  # Window already closed, nothing left to update
+
+    def load_progress(self):
         """Load progress from JSON file"""
+        # completed_files is not restored: a caption cleared since the last save
+        # would still be listed, and resuming would skip that image
         try:
             if os.path.exists(self.progress_file):
                 with open(self.progress_file, 'r') as f:
                     data = json.load(f)
                     self.total_images = data.get('total_images', 0)
                     self.completed_images = data.get('completed_images', 0)
-                    return set(data.get('completed_files', []))
-            return set()
+                    self.digest_to_file = data.get('digest_to_file', {})
         except Exception as e:
             print(f"Error loading progress: {e}")
-            return set()
 
     def save_progress(self):
         """Save progress to JSON file"""
@@ -326,15 +580,24 @@ class CaptionEditorApp:
                 'completed_files': list(self.completed_files),
                 'last_updated': datetime.now().isoformat(),
                 'total_images': self.total_images,
-                'completed_images': len(self.completed_files)
+                'completed_images': len(self.completed_files),
+                'digest_to_file': self.digest_to_file
             }
             with open(self.progress_file, 'w') as f:
                 json.dump(data, f, indent=2)
         except Exception as e:
             print(f"Error saving progress: {e}")
 
-    def generate_captions(self):
-        """Start caption generation in a background thread"""
+    def regenerate_captions(self):
+        """Discard existing progress and caption every image again"""
+        if self.processing:
+            return  # Already processing
+        if not messagebox.askokcancel("Confirm", "Regenerate captions for all images, replacing existing ones?"):
+            return
+        self.generate_captions(regenerate=True)
+
+    def generate_captions(self, regenerate=False):
+        """Start caption generation in a background thread, skipping captioned images unless regenerating"""
         if not self.openai_key:
             messagebox.showerror(
                 "Error", 
@@ -350,288 +613,723 @@ class CaptionEditorApp:
         self.should_stop = False
         
         # Get sorted list of all images
-        all_images = sorted(f for f in os.listdir(self.images_dir) 
-                          if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')))
+        all_images = self.list_images()
         self.total_images = len(all_images)
         
-        # Start fresh
-        print("\nStarting caption generation")
-        self.completed_files.clear()
-        self.completed_images = 0
-        images_to_process = all_images.copy()
+        if regenerate:
+            # Start fresh
+            print("\nStarting caption generation for all images")
+            self.completed_files.clear()
+            
+            # Clear all caption widgets
+            for widget in self.caption_widgets.values():
+                widget.delete('1.0', tk.END)
+                widget.edit_modified(False)
+            self.original_captions.clear()
+            self._edited_captions.clear()
+            self._dirty.clear()
+        else:
+            print("\nResuming caption generation")
         
-        # Clear all caption widgets
-        for widget in self.caption_widgets.values():
-            widget.delete('1.0', tk.END)
-        self.original_captions.clear()
+        # Keep existing captions and only process what is missing
+        images_to_process = [f for f in all_images if f not in self.completed_files]
+        self.completed_images = len(self.completed_files & set(all_images))
+        if not images_to_process:
+            self.processing = False
+            messagebox.showinfo("Info", "All images already have captions. Use Regenerate All to start over.")
+            return
         
         # Show progress elements
         self.progress_frame.pack(fill=tk.X, padx=10, pady=5)
-        self.progress_var.set(0)
-        self.status_label.config(text=f"Processing: 0/{self.total_images}")
+        self.progress_var.set((self.completed_images / self.total_images) * 100)
+        self.status_label.config(text=f"Processing: {self.completed_images}/{self.total_images}")
         
-        # Disable generate button during processing
+        # Disable generate buttons during processing
         self.generate_btn.configure(state="disabled")
+        self.batch_btn.configure(state="disabled")
+        self.regenerate_btn.configure(state="disabled")
         
         # Force GUI update
         self.root.update_idletasks()
         
         # Start processing thread
         thread = threading.Thread(
-            target=self.process_images_thread, 
-            args=(images_to_process, all_images)
+            target=self._run_jobs, 
+            args=(images_to_process, all_images, self.build_prompt(), regenerate)
         )
         thread.daemon = True
         thread.start()
 
-    def process_images_thread(self, images_to_process, all_images):
-        """Process images in a background thread"""
+    def _run_jobs(self, images_to_process, all_images, prompt, regenerate=False):
+        """Caption one or more images in a background thread running an asyncio event loop"""
         try:
-            total = len(all_images)
-            
-            for img_file in images_to_process:
-                if self.should_stop:
-                    print("\nProcessing stopped by user")
-                    self.caption_queue.put(("STOPPED", None))
-                    break
-                
-                try:
-                    # Get global index (1-based) for this image
-                    global_idx = all_images.index(img_file) + 1
-                    
-                    print(f"\nProcessing [{global_idx}/{total}] {img_file}")
-                    img_path = os.path.join(self.images_dir, img_file)
-                    out_path = os.path.join(self.captions_dir, os.path.splitext(img_file)[0] + ".txt")
-                    
-                    # Update status
-                    status_msg = f"Processing: {img_file} ({global_idx}/{total})"
-                    self.caption_queue.put(("STATUS", status_msg))
-                    
-                    # Generate caption
-                    caption = self.caption_image(img_path, global_idx, total)
-                    if not caption or len(caption.strip()) == 0:
-                        raise ValueError("Empty caption received")
-                    
-                    # Save to file
-                    with open(out_path, 'w') as f:
-                        f.write(caption)
-                    print(f"💾 Saved caption for [{global_idx}/{total}] {img_file}")
-                    
-                    # Update GUI and progress tracking
-                    self.caption_queue.put(("UPDATE_GUI", {
-                        'img_file': img_file,
-                        'caption': caption,
-                        'completed_files': self.completed_files | {img_file},
-                        'total': total
-                    }))
-                    
-                    # Small delay between images
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    error_msg = f"❌ Failed to process {img_file}: {str(e)}"
-                    print(error_msg)
-                    self.caption_queue.put(("ERROR", error_msg))
-                    if "quota" in str(e).lower():
-                        self.should_stop = True
-                        break
-                    continue
-                    
+            asyncio.run(self._process_async(images_to_process, all_images, prompt, regenerate))
+        except Exception as e:
+            error_msg = f"❌ Caption generation failed: {str(e)}"
+            print(error_msg)
+            self._post("ERROR", error_msg)
         finally:
             print("\nProcessing thread finished")
             self.processing = False
-            if not self.should_stop:
-                self.caption_queue.put(("DONE", None))
-
-    def caption_image(self, image_path, idx, total):
-        """Generate caption for a single image using GPT-4 Vision"""
-        # Set up logging for this session
-        logging.basicConfig(
-            filename='caption_debug.log',
-            level=logging.DEBUG,
-            format='%(asctime)s - %(message)s',
-            filemode='a'  # Append mode instead of write
-        )
+            # Always post, the Tk thread re-enables the buttons either way
+            self._post("STOPPED" if self.should_stop else "DONE", None)
+
+    def _save_caption(self, img_file, caption, global_idx, total, completed_files):
+        """Write a caption file and push the result to the GUI; returns False once stopped"""
+        # Requests still in flight when Clear All or close stopped the run must not
+        # write the files that were just deleted
+        if self.should_stop:
+            return False
         
-        filename = os.path.basename(image_path)
-        logging.debug(f"\n[{idx}/{total}] Starting processing of: {filename}")
+        # Save to file
+        out_path = self.caption_path(img_file)
+        with open(out_path, 'w', encoding='utf-8') as f:
+            f.write(caption)
+        print(f"💾 Saved caption for [{global_idx}/{total}] {img_file}")
+        
+        # Update GUI and progress tracking
+        completed_files.add(img_file)
+        self._post("STATUS", f"Processed: {img_file} ({global_idx}/{total})")
+        self._post("UPDATE_GUI", {
+            'img_file': img_file,
+            'caption': caption,
+            'completed_files': set(completed_files),
+            'total': total
+        })
+        return True
+
+    async def _process_one(self, client, img_file, global_idx, total, prompt, completed_files,
+                           regenerate=False, digest=None):
+        """Caption and save one image, reporting failures to the GUI; returns the caption or None"""
+        print(f"\nProcessing [{global_idx}/{total}] {img_file}")
+        img_path = os.path.join(self.images_dir, img_file)
+        try:
+            caption = await self.caption_image(client, img_path, global_idx, total, prompt, regenerate, digest)
+            if not caption or len(caption.strip()) == 0:
+                raise ValueError("Empty caption received")
+            if not self._save_caption(img_file, caption, global_idx, total, completed_files):
+                return None
+            return caption
+            
+        except Exception as e:
+            error_msg = f"❌ Failed to process {img_file}: {str(e)}"
+            print(error_msg)
+            self._post("ERROR", error_msg)
+            if "quota" in str(e).lower():
+                self.should_stop = True
+            return None
+
+    async def _process_async(self, images_to_process, all_images, prompt, regenerate=False):
+        """Caption images concurrently over one shared HTTP connection pool"""
+        total = len(all_images)
+        idx_map = {f: i + 1 for i, f in enumerate(all_images)}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        completed_files = set(self.completed_files)
+        
+        # Identical files only need one API call
+        self._post("STATUS", "Checking for duplicate images...")
+        digests = await asyncio.to_thread(self.hash_images, images_to_process)
+        representatives = {}
+        duplicates = {}
+        for img_file in images_to_process:
+            digest = digests[img_file]
+            if digest in representatives:
+                duplicates[img_file] = representatives[digest]
+            else:
+                representatives[digest] = img_file
+        
+        async def caption_unique(client, digest, img_file):
+            # Copies of an image captioned in an earlier run reuse that caption
+            previous = None if regenerate else self.digest_to_file.get(digest)
+            if previous and previous != img_file and previous not in digests:
+                previous_path = self.caption_path(previous)
+                if os.path.exists(previous_path):
+                    with open(previous_path, 'r', encoding='utf-8') as f:
+                        caption = f.read().strip()
+                    if caption:
+                        print(f"♻️ Reusing caption of identical image {previous} for {img_file}")
+                        self._save_caption(img_file, caption, idx_map[img_file], total, completed_files)
+                        return caption
+            self.digest_to_file[digest] = img_file
+            async with semaphore:
+                if self.should_stop:
+                    return None
+                return await self._process_one(
+                    client, img_file, idx_map[img_file], total, prompt, completed_files,
+                    regenerate, bytes.fromhex(digest)  # Already hashed above, skip a second pass
+                )
+        
+        async with openai.AsyncOpenAI(api_key=self.openai_key) as client:
+            results = await asyncio.gather(*[
+                caption_unique(client, digest, img_file)
+                for digest, img_file in representatives.items()
+            ])
+        captions = dict(zip(representatives.values(), results))
         
-        with open(image_path, "rb") as img_file:
-            image_bytes = img_file.read()
-            base64_image = base64.b64encode(image_bytes).decode('utf-8')
+        for img_file, representative in duplicates.items():
+            if captions[representative] and not self.should_stop:
+                print(f"♻️ Reusing caption of identical image {representative} for {img_file}")
+                self._save_caption(img_file, captions[representative], idx_map[img_file], total, completed_files)
+        
+        if self.should_stop:
+            print("\nProcessing stopped by user")
+
+    def hash_images(self, image_files):
+        """Return {img_file: sha1 hex digest} of the raw file contents, read in 8 KB chunks"""
+        digests = {}
+        for img_file in image_files:
+            sha1 = hashlib.sha1()
+            with open(os.path.join(self.images_dir, img_file), "rb") as f:
+                for chunk in iter(lambda: f.read(8192), b""):
+                    sha1.update(chunk)
+            digests[img_file] = sha1.hexdigest()
+        return digests
+
+    async def wait_for_rate_limit(self):
+        """Sleep until the next request fits within the configured requests per minute"""
+        interval = 60.0 / self.requests_per_minute
+        now = time.monotonic()
+        wait = self._next_request_time - now
+        self._next_request_time = max(now, self._next_request_time) + interval
+        if wait > 0:
+            await asyncio.sleep(wait)
 
-        logging.debug(f"[{idx}/{total}] Sending request to OpenAI API for {filename}")
-        print(f"🔄 Sending API request for [{idx}/{total}] {filename}...")
+    def generate_captions_batch(self):
+        """Submit the images still missing a caption as one OpenAI Batch API job in a background thread"""
+        if not self.openai_key:
+            messagebox.showerror(
+                "Error", 
+                "OpenAI API key not found! Please set the OPENAI_API_KEY environment variable."
+            )
+            return
         
+        if self.processing:
+            return  # Already processing
+            
+        self.processing = True
+        self.should_stop = False
+        
+        # Get sorted list of all images
+        all_images = self.list_images()
+        self.total_images = len(all_images)
+        
+        # Like Generate All, leave existing (possibly hand-edited) captions alone
+        images_to_process = [f for f in all_images if f not in self.completed_files]
+        self.completed_images = len(self.completed_files & set(all_images))
+        if not images_to_process:
+            self.processing = False
+            messagebox.showinfo("Info", "All images already have captions. Use Regenerate All to start over.")
+            return
+        
+        print("\nStarting batch caption generation")
+        
+        # Show progress elements
+        self.progress_frame.pack(fill=tk.X, padx=10, pady=5)
+        self.progress_var.set((self.completed_images / self.total_images) * 100)
+        self.status_label.config(text="Preparing batch request...")
+        
+        # Disable generate buttons during processing
+        self.generate_btn.configure(state="disabled")
+        self.batch_btn.configure(state="disabled")
+        self.regenerate_btn.configure(state="disabled")
+        
+        # Force GUI update
+        self.root.update_idletasks()
+        
+        # Read the prompt here, Tk widgets must not be touched from the worker
+        thread = threading.Thread(
+            target=self.process_images_batch_thread, 
+            args=(images_to_process, all_images, self.build_prompt())
+        )
+        thread.daemon = True
+        thread.start()
+
+    def process_images_batch_thread(self, images_to_process, all_images, prompt):
+        """Build, submit and poll a Batch API job, then map results back by custom_id"""
+        batch_path = None
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4o",  # Updated to recommended replacement model for vision capabilities
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": (
-                            "You are a caption generator that follows instructions precisely. "
-                            "Output ONLY the raw caption text. "
-                            "DO NOT add any prefixes, quotes, or formatting."
-                        )
-                    },
-                    {
-                        "role": "user", 
-                        "content": [
-                            {"type": "text", "text": self.build_prompt()},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}",
-                                    "detail": "low"  # Use low detail to reduce tokens
-                                }
-                            }
-                        ]
+            total = len(all_images)
+            
+            # Identical files only need one request
+            self._post("STATUS", "Checking for duplicate images...")
+            digests = self.hash_images(images_to_process)
+            representatives = {}
+            duplicates = {}
+            for img_file in images_to_process:
+                digest = digests[img_file]
+                if digest in representatives:
+                    duplicates[img_file] = representatives[digest]
+                else:
+                    representatives[digest] = img_file
+            submitted = len(representatives)
+            
+            # Write one /v1/chat/completions request per image
+            with tempfile.NamedTemporaryFile(
+                'w', suffix=".jsonl", delete=False, encoding='utf-8'
+            ) as batch_file:
+                batch_path = batch_file.name
+                for i, (digest, img_file) in enumerate(representatives.items(), 1):
+                    if self.should_stop:
+                        print("\nProcessing stopped by user")
+                        return
+                    self._post("STATUS", f"Encoding: {img_file} ({i}/{submitted})")
+                    img_path = os.path.join(self.images_dir, img_file)
+                    base64_image = self.encode_image(img_path, bytes.fromhex(digest))[1]
+                    request = {
+                        "custom_id": img_file,
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": self.model,
+                            "messages": self.build_messages(base64_image, prompt),
+                            "max_tokens": 300,
+                        }
                     }
-                ],
-                max_tokens=300,
+                    batch_file.write(json.dumps(request) + "\n")
+            
+            # Upload the request file and start the job
+            self._post("STATUS", "Uploading batch request...")
+            with open(batch_path, "rb") as f:
+                input_file = openai.files.create(file=f, purpose="batch")
+            batch = openai.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
             )
-
-            caption = response.choices[0].message.content.strip()
-            logging.debug(f"[{idx}/{total}] Received response for {filename}")
-            logging.debug(f"[{idx}/{total}] Original caption: '{caption}'")
-            print(f"📝 Got response for [{idx}/{total}] {filename}")
+            print(f"📦 Submitted batch {batch.id} with {submitted} requests")
             
-            # Remove all known prefix variations
-            prefixes_to_remove = [
-                "Caption for Image:", 
-                "Caption for the Image:",
-                "Caption for the image:",
-                "Caption for The Image:",
-                "Caption:", 
-                "Description:", 
-                "Generated Caption:", 
-                "Image Caption:",
-                "Caption for Art Training Dataset:",
-                "Caption for Image Training:",
-                "Final Caption:",
-                "Suggested Caption:"
-            ]
-            
-            # Convert to lowercase for comparison but keep original for replacement
-            caption_lower = caption.lower()
-            original_caption = caption
-            
-            logging.debug(f"[{idx}/{total}] Looking for prefixes in: '{caption_lower}'")
-            for prefix in prefixes_to_remove:
-                prefix_lower = prefix.lower()
-                logging.debug(f"[{idx}/{total}] Checking prefix: '{prefix_lower}'")
-                if caption_lower.startswith(prefix_lower):
-                    logging.debug(f"[{idx}/{total}] Found matching prefix: '{prefix}'")
-                    # Use the length of the matching text from the original
-                    prefix_length = len(caption_lower[:len(prefix_lower)].strip())
-                    caption = original_caption[prefix_length:].strip()
-                    print(f"🔍 Removed prefix in [{idx}/{total}] {filename}")
-                    break
+            # Poll until the job reaches a terminal state
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                if self.should_stop:
+                    print(f"\nProcessing stopped by user, cancelling batch {batch.id}")
+                    openai.batches.cancel(batch.id)
+                    return
+                counts = batch.request_counts
+                done = counts.completed + counts.failed if counts else 0
+                self._post("STATUS", f"Batch {batch.status}: {done}/{submitted}")
+                time.sleep(self.batch_poll_interval)
+                batch = openai.batches.retrieve(batch.id)
             
-            logging.debug(f"[{idx}/{total}] After prefix removal: '{caption}'")
+            if batch.status != "completed":
+                raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
             
-            # Remove surrounding quotes (both single and double)
-            if (caption.startswith('"') and caption.endswith('"')) or \
-               (caption.startswith("'") and caption.endswith("'")):
-                caption = caption[1:-1].strip()
-                logging.debug(f"[{idx}/{total}] Removed surrounding quotes")
-                print(f"✂️ Removed quotes in [{idx}/{total}] {filename}")
+            # Stream the output file and push each caption to the GUI
+            completed_files = set(self.completed_files)
+            idx_map = {f: i + 1 for i, f in enumerate(all_images)}
+            captions = {}
+            with openai.files.with_streaming_response.content(batch.output_file_id) as output:
+                for line in output.iter_lines():
+                    if not line:
+                        continue
+                    result = json.loads(line)
+                    img_file = result["custom_id"]
+                    global_idx = idx_map.get(img_file, 0)
+                    try:
+                        response = result.get("response") or {}
+                        if response.get("status_code") != 200:
+                            raise RuntimeError(result.get("error") or response.get("body"))
+                        caption = response["body"]["choices"][0]["message"]["content"].strip()
+                        caption = self.clean_caption(caption, global_idx, total, img_file)
+                        if not caption:
+                            raise ValueError("Empty caption received")
+                        
+                        if self._save_caption(img_file, caption, global_idx, total, completed_files):
+                            captions[img_file] = caption
+                    except Exception as e:
+                        error_msg = f"❌ Failed to process {img_file}: {str(e)}"
+                        print(error_msg)
+                        self._post("ERROR", error_msg)
+            
+            for img_file, representative in duplicates.items():
+                if representative in captions:
+                    print(f"♻️ Reusing caption of identical image {representative} for {img_file}")
+                    self._save_caption(img_file, captions[representative], idx_map[img_file], total, completed_files)
+            
+            if batch.request_counts and batch.request_counts.failed:
+                self._post(
+                    "ERROR",
+                    f"❌ {batch.request_counts.failed} batch requests failed (see error file {batch.error_file_id})"
+                )
+                
+        except Exception as e:
+            error_msg = f"❌ Batch caption generation failed: {str(e)}"
+            print(error_msg)
+            self._post("ERROR", error_msg)
+            
+        finally:
+            if batch_path and os.path.exists(batch_path):
+                os.remove(batch_path)
+            print("\nBatch processing thread finished")
+            self.processing = False
+            # Always post, the Tk thread re-enables the buttons either way
+            self._post("STOPPED" if self.should_stop else "DONE", None)
+
+    def encode_image(self, image_path, digest=None):
+        """Return (sha1 digest, base64 string) of a downscaled JPEG, hashing only if no digest is given"""
+        # Map the file instead of reading it, the OS pages in only what hashing and decoding touch
+        with open(image_path, "rb") as img_file, \
+             mmap.mmap(img_file.fileno(), 0, access=mmap.ACCESS_READ) as image_map:
+            if digest is None:
+                digest = hashlib.sha1(image_map).digest()
+            cache_key = digest + f"{self.upload_size}q{self.upload_quality}".encode('ascii')
             
-            logging.debug(f"[{idx}/{total}] Final caption for {filename}: '{caption}'")
-            print(f"✨ Finalized caption for [{idx}/{total}] {filename}")
+            base64_image = self.cache_get("SELECT b64 FROM b64_cache WHERE sha1 = ?", cache_key)
+            if base64_image is None:
+                # Shrink to what the API will actually look at before uploading
+                with Image.open(image_map) as image, io.BytesIO() as buf:
+                    image.thumbnail(self.upload_size, Image.LANCZOS)
+                    image.convert("RGB").save(buf, "JPEG", quality=self.upload_quality)
+                    # Encode straight from the buffer's memory instead of a getvalue() copy
+                    with buf.getbuffer() as jpeg_bytes:
+                        base64_image = base64.b64encode(jpeg_bytes).decode('ascii')
+                self.cache_put("b64_cache", cache_key, base64_image)
+        return digest, base64_image
+
+    def build_messages(self, base64_image, prompt):
+        """Build the chat messages for a single caption request"""
+        return [
+            {
+                "role": "system", 
+                "content": self.system_prompt
+            },
+            {
+                "role": "user", 
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{base64_image}",
+                            "detail": "low"  # Use low detail to reduce tokens
+                        }
+                    }
+                ]
+            }
+        ]
+
+    async def caption_image(self, client, image_path, idx, total, prompt, regenerate=False, digest=None):
+        """Generate caption for a single image using GPT-4 Vision; regenerate skips the cached caption"""
+        filename = os.path.basename(image_path)
+        _log.debug(f"\n[{idx}/{total}] Starting processing of: {filename}")
+        
+        # Resizing is CPU-bound, keep it off the event loop
+        digest, base64_image = await asyncio.to_thread(self.encode_image, image_path, digest)
+        
+        # Reuse the caption if this exact image was already sent with this prompt
+        result_key = hashlib.sha1(digest + f"{self.model}\n{prompt}".encode('utf-8')).digest()
+        cached = None
+        if not regenerate:
+            cached = self.cache_get("SELECT caption FROM caption_cache WHERE key = ?", result_key)
+        if cached:
+            _log.debug(f"[{idx}/{total}] Using cached caption for {filename}")
+            print(f"⚡ Using cached caption for [{idx}/{total}] {filename}")
+            return cached
+
+        try:
+            for attempt in range(self.max_retries):
+                _log.debug(f"[{idx}/{total}] Sending request to OpenAI API for {filename}")
+                await self.wait_for_rate_limit()
+                print(f"🔄 Sending API request for [{idx}/{total}] {filename}...")
+                try:
+                    response = await client.chat.completions.create(
+                        model=self.model,  # Updated to recommended replacement model for vision capabilities
+                        messages=self.build_messages(base64_image, prompt),
+                        max_tokens=300,
+                    )
+                    break
+                except openai.RateLimitError as e:
+                    # An exhausted quota will not recover by waiting
+                    if "quota" in str(e).lower() or attempt == self.max_retries - 1:
+                        raise
+                    delay = 2 ** attempt
+                    print(f"⏳ Rate limited on [{idx}/{total}] {filename}, retrying in {delay}s")
+                    await asyncio.sleep(delay)
+
+            caption = response.choices[0].message.content.strip()
+            _log.debug(f"[{idx}/{total}] Received response for {filename}")
+            print(f"📝 Got response for [{idx}/{total}] {filename}")
             
-            return caption.strip()
+            caption = self.clean_caption(caption, idx, total, filename)
+            if caption:
+                self.cache_put("caption_cache", result_key, caption)
+            return caption
             
         except Exception as e:
-            logging.error(f"[{idx}/{total}] Error processing {filename}: {str(e)}")
+            _log.error(f"[{idx}/{total}] Error processing {filename}: {str(e)}")
             raise
 
+    def clean_caption(self, caption, idx, total, filename):
+        """Strip known prefixes and surrounding quotes from a raw model caption"""
+        _log.debug(f"[{idx}/{total}] Original caption: '{caption}'")
+        
+        # Remove all known prefix variations
+        caption, removed = _PREFIX_RE.subn('', caption, count=1)
+        if removed:
+            caption = caption.strip()
+            print(f"🔍 Removed prefix in [{idx}/{total}] {filename}")
+        
+        _log.debug(f"[{idx}/{total}] After prefix removal: '{caption}'")
+        
+        # Remove surrounding quotes (both single and double)
+        caption, removed = _QUOTE_RE.subn(r'\2', caption)
+        if removed:
+            caption = caption.strip()
+            _log.debug(f"[{idx}/{total}] Removed surrounding quotes")
+            print(f"✂️ Removed quotes in [{idx}/{total}] {filename}")
+        
+        _log.debug(f"[{idx}/{total}] Final caption for {filename}: '{caption}'")
+        print(f"✨ Finalized caption for [{idx}/{total}] {filename}")
+        
+        return caption.strip()
+
+    def list_images(self):
+        """Return the sorted image filenames in the images folder"""
+        # scandir's DirEntry already knows the file type, no extra stat per file
+        with os.scandir(self.images_dir) as entries:
+            return sorted(
+                entry.name for entry in entries
+                if _is_image_name(entry.name) and entry.is_file()
+            )
+
+    def caption_name(self, img_file):
+        """Caption filename for an image: its name with the last extension replaced by .txt"""
+        dot = img_file.rfind('.')
+        return (img_file[:dot] if dot > 0 else img_file) + ".txt"
+
+    def caption_path(self, img_file):
+        """Caption path for an image, precomputed for every image found at startup"""
+        caption_file = self._caption_paths.get(img_file)
+        if caption_file is None:
+            caption_file = self._cap_dir_sep + self.caption_name(img_file)
+        return caption_file
+
+    def list_captions(self):
+        """Return the set of caption filenames in the captions folder, in one directory scan"""
+        with os.scandir(self.captions_dir) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+
     def load_content(self):
-        """Load and display images with their captions"""
+        """Load captions and size the image list; rows are pooled and bound on scroll"""
         # Get sorted list of images
-        self.all_images = [f for f in os.listdir(self.images_dir) 
-                          if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp'))]
-        self.all_images.sort()
+        self.all_images = self.list_images()
         self.total_images = len(self.all_images)
+        self.image_index = {f: i for i, f in enumerate(self.all_images)}
         
-        for idx, img_file in enumerate(self.all_images):
-            # Create frame for this image-caption pair using tk.Frame
-            pair_frame = tk.Frame(
-                self.scrollable_frame,
-                borderwidth=self.BORDER_WIDTH,
-                relief="solid",
-                highlightthickness=self.BORDER_WIDTH,
-                highlightcolor=self.INACTIVE_BORDER_COLOR,
-                highlightbackground=self.INACTIVE_BORDER_COLOR
-            )
-            pair_frame.pack(fill=tk.X, padx=5, pady=5)
-            self.caption_frames[img_file] = pair_frame
-            
-            # Left side: Image and caption
-            left_frame = tk.Frame(pair_frame)
-            left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            
-            # Load and display thumbnail
-            img_path = os.path.join(self.images_dir, img_file)
-            try:
-                image = Image.open(img_path)
-                image.thumbnail(self.thumbnail_size)
-                photo = ImageTk.PhotoImage(image)
-                self.thumbnail_refs[img_file] = photo
-                
-                label = ttk.Label(left_frame, image=photo)
-                label.pack(side=tk.LEFT, padx=(0, 10))
-                
-                # Create caption container frame
-                caption_container = tk.Frame(left_frame)
-                caption_container.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-                
-                # Add filename display using a Label
-                filename_label = ttk.Label(
-                    caption_container,
-                    text=img_file,
-                    background='#f0f0f0',
-                    padding=(5, 2)  # Add some padding for better appearance
-                )
-                filename_label.pack(fill=tk.X, pady=(0, 2))
-                
-                # Create caption widget with slightly reduced height
-                caption_widget = scrolledtext.ScrolledText(caption_container, height=4, width=50)
-                caption_widget.pack(fill=tk.BOTH, expand=True)
-                
-                # Load caption if it exists
-                caption_file = os.path.join(self.captions_dir, os.path.splitext(img_file)[0] + ".txt")
-                if os.path.exists(caption_file):
-                    with open(caption_file, 'r') as f:
-                        caption = f.read().strip()
-                        caption_widget.insert('1.0', caption)
-                        self.original_captions[img_file] = caption
-                        self.completed_files.add(img_file)
-                
-                self.caption_widgets[img_file] = caption_widget
-                
-                # Right side: Buttons
-                button_frame = tk.Frame(pair_frame)
-                button_frame.pack(side=tk.RIGHT, padx=5)
-                
-                # Add Clear and Generate buttons for this row
-                clear_btn = ttk.Button(
-                    button_frame, 
-                    text="Clear",
-                    command=lambda i=idx: self.clear_single_caption(i)
-                )
-                clear_btn.pack(side=tk.RIGHT, padx=2)
-                
-                generate_btn = ttk.Button(
-                    button_frame, 
-                    text="Generate",
-                    command=lambda i=idx: self.generate_single_caption(i)
-                )
-                generate_btn.pack(side=tk.RIGHT, padx=2)
-                
-            except Exception as e:
-                print(f"Error loading {img_file}: {e}")
+        # Same-size blank image keeps row heights stable until thumbnails arrive
+        self.blank_thumbnail = tk.PhotoImage(width=self.thumbnail_size[0], height=self.thumbnail_size[1])
+        self.row_height = self.thumbnail_size[1] + 4 * self.BORDER_WIDTH
+        self.row_stride = self.row_height + 2 * self.ROW_PADY
+        os.makedirs(self.thumbnail_cache_dir, exist_ok=True)
+        
+        # One fixed-height container gives the scroll region its full size, the
+        # few rows on screen are placed inside it at their image's offset
+        self.rows_container = tk.Frame(self.scrollable_frame, height=len(self.all_images) * self.row_stride)
+        self.rows_container.pack(fill=tk.X)
+        
+        # Placed rows do not request width, so size the container after one pooled row
+        row = self.create_row()
+        row['frame'].update_idletasks()
+        self.rows_container.configure(width=row['frame'].winfo_reqwidth() + 10)
+        self.free_rows.append(row)
+        
+        caption_set = self.list_captions()
+        for img_file in self.all_images:
+            # Load caption if it exists
+            caption_name = self.caption_name(img_file)
+            caption_file = self._cap_dir_sep + caption_name
+            self._caption_paths[img_file] = caption_file
+            if caption_name in caption_set:
+                with open(caption_file, 'r', encoding='utf-8') as f:
+                    self.original_captions[img_file] = f.read().strip()
+                    self.completed_files.add(img_file)
+
+    def _on_frame_configure(self, event):
+        """Keep the scroll region in sync and bind rows that became visible"""
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self.schedule_visible_update()
+
+    def _on_canvas_scroll(self, first, last):
+        """Canvas yscrollcommand: move the scrollbar and bind rows that came into view"""
+        self.scrollbar.set(first, last)
+        self.schedule_visible_update()
+
+    def schedule_visible_update(self):
+        """Coalesce scroll and resize events into one visible-rows pass"""
+        if not self._visible_update_scheduled:
+            self._visible_update_scheduled = True
+            self.root.after_idle(self.update_visible_rows)
+
+    def visible_row_range(self):
+        """Return (first, last) row indices currently inside the viewport"""
+        top, bottom = self.canvas.yview()
+        height = self.scrollable_frame.winfo_height()
+        first_y = self.rows_container.winfo_y()
+        first = int((top * height - first_y) // self.row_stride)
+        last = int((bottom * height - first_y) // self.row_stride) + 1
+        return max(0, first), min(len(self.all_images), last)
+
+    def is_row_near_view(self, idx):
+        """Whether a row is close enough to the viewport to hold a thumbnail"""
+        first, last = self.visible_row_range()
+        return first - self.thumbnail_keep_rows <= idx < last + self.thumbnail_keep_rows
+
+    def update_visible_rows(self):
+        """Recycle pooled rows onto the images around the viewport"""
+        self._visible_update_scheduled = False
+        if not self.all_images:
+            return
+        
+        first, last = self.visible_row_range()
+        start = max(0, first - self.row_overscan)
+        end = min(len(self.all_images), last + self.row_overscan)
+        wanted = set(self.all_images[start:end])
+        
+        # Free rows that scrolled away before binding new ones, so they get reused
+        for img_file in [f for f in self.visible_rows if f not in wanted]:
+            self.unbind_row(img_file)
+        for idx in range(start, end):
+            if self.all_images[idx] not in self.visible_rows:
+                row = self.free_rows.pop() if self.free_rows else self.create_row()
+                self.bind_row(row, idx)
+        
+        # Drop thumbnails that have scrolled far away, they reload from the disk cache
+        for img_file in list(self.thumbnail_refs):
+            idx = self.image_index[img_file]
+            if not first - self.thumbnail_keep_rows <= idx < last + self.thumbnail_keep_rows:
+                del self.thumbnail_refs[img_file]
+
+    def create_row(self):
+        """Create the widgets for one pooled row; bind_row fills them for an image"""
+        # Create frame for this image-caption pair using tk.Frame
+        pair_frame = tk.Frame(
+            self.rows_container,
+            borderwidth=self.BORDER_WIDTH,
+            relief="solid",
+            highlightthickness=self.BORDER_WIDTH,
+            highlightcolor=self.INACTIVE_BORDER_COLOR,
+            highlightbackground=self.INACTIVE_BORDER_COLOR
+        )
+        
+        # Left side: Image and caption
+        left_frame = tk.Frame(pair_frame)
+        left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Thumbnail is filled in once its worker process has decoded it
+        label = ttk.Label(left_frame, image=self.blank_thumbnail)
+        label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Create caption container frame
+        caption_container = tk.Frame(left_frame)
+        caption_container.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Add filename display using a Label
+        filename_label = ttk.Label(
+            caption_container,
+            background='#f0f0f0',
+            padding=(5, 2)  # Add some padding for better appearance
+        )
+        filename_label.pack(fill=tk.X, pady=(0, 2))
+        
+        # Create caption widget with slightly reduced height
+        caption_widget = scrolledtext.ScrolledText(caption_container, height=4, width=50)
+        caption_widget.pack(fill=tk.BOTH, expand=True)
+        
+        # Right side: Buttons
+        button_frame = tk.Frame(pair_frame)
+        button_frame.pack(side=tk.RIGHT, padx=5)
+        
+        # Add Clear and Generate buttons for this row
+        clear_btn = ttk.Button(button_frame, text="Clear")
+        clear_btn.pack(side=tk.RIGHT, padx=2)
+        
+        generate_btn = ttk.Button(button_frame, text="Generate")
+        generate_btn.pack(side=tk.RIGHT, padx=2)
+        
+        row = {
+            'frame': pair_frame,
+            'thumbnail': label,
+            'filename': filename_label,
+            'caption': caption_widget,
+            'clear': clear_btn,
+            'generate': generate_btn,
+            'img_file': None
+        }
+        # Look the image up when the event fires, the row may have been rebound since
+        caption_widget.bind("<<Modified>>", lambda e, r=row: self._on_caption_modified(r['img_file']))
+        return row
+
+    def bind_row(self, row, idx):
+        """Show one image in a pooled row and place it at that image's offset"""
+        img_file = self.all_images[idx]
+        row['img_file'] = img_file
+        row['filename'].configure(text=img_file)
+        
+        widget = row['caption']
+        widget.delete('1.0', tk.END)
+        caption = self._edited_captions.get(img_file, self.original_captions.get(img_file))
+        if caption:
+            widget.insert('1.0', caption)
+        widget.edit_modified(False)
+        
+        row['thumbnail'].configure(image=self.thumbnail_refs.get(img_file, self.blank_thumbnail))
+        row['clear'].configure(command=lambda i=idx: self.clear_single_caption(i))
+        row['generate'].configure(command=lambda i=idx: self.generate_single_caption(i))
+        self.set_row_highlight(row, img_file == self.current_active_frame)
+        
+        row['frame'].place(
+            x=5, y=idx * self.row_stride + self.ROW_PADY,
+            relwidth=1.0, width=-10, height=self.row_height
+        )
+        self.visible_rows[img_file] = row
+        self.caption_widgets[img_file] = widget
+        
+        if (img_file not in self.thumbnail_refs and img_file not in self.pending_thumbnails
+                and img_file not in self.failed_thumbnails):
+            self.request_thumbnail(img_file)
+
+    def unbind_row(self, img_file):
+        """Return an image's row to the pool, keeping any unsaved edit"""
+        row = self.visible_rows.pop(img_file)
+        widget = self.caption_widgets.pop(img_file)
+        if img_file in self._dirty:
+            self._edited_captions[img_file] = widget.get('1.0', tk.END).rstrip('\n')
+        row['frame'].place_forget()
+        row['img_file'] = None
+        self.free_rows.append(row)
+
+    def request_thumbnail(self, img_file):
+        """Decode a thumbnail in the process pool, PIL decoding is CPU-bound"""
+        if self.thumbnail_pool is None:
+            self.thumbnail_pool = Pool(os.cpu_count())
+        self.pending_thumbnails.add(img_file)
+        self.thumbnail_pool.apply_async(
+            _decode_thumb,
+            (os.path.join(self.images_dir, img_file), self.thumbnail_size, self.thumbnail_cache_dir),
+            callback=self._on_thumbnail_decoded
+        )
+        if not self._thumbnail_poll_scheduled:
+            self._thumbnail_poll_scheduled = True
+            self.root.after(50, self._poll_thumbnails)
+
+    def _on_thumbnail_decoded(self, result):
+        """Pool callback (runs on the pool's result thread): hand pixels to the Tk thread"""
+        # Only queue here: waking Tk from this thread would deadlock with
+        # Pool.terminate(), which joins it from the Tk thread on shutdown
+        path, data, size, mode = result
+        self.caption_queue.put(("THUMBNAIL", {
+            'img_file': os.path.basename(path),
+            'data': data,
+            'size': size,
+            'mode': mode
+        }))
+
+    def _poll_thumbnails(self):
+        """Drain decoded thumbnails on the Tk thread while any are still pending"""
+        self.check_caption_queue()
+        if self.pending_thumbnails:
+            self.root.after(50, self._poll_thumbnails)
+        else:
+            self._thumbnail_poll_scheduled = False
 
     def clear_single_caption(self, idx):
         """Clear caption for a single image"""
@@ -648,12 +1346,17 @@ class CaptionEditorApp:
             if img_file in self.caption_widgets:
                 widget = self.caption_widgets[img_file]
                 widget.delete('1.0', tk.END)
+                widget.edit_modified(False)
                 widget.update_idletasks()
+            self._edited_captions.pop(img_file, None)
+            self._dirty.discard(img_file)
             
             # Delete caption file
-            caption_file = os.path.join(self.captions_dir, os.path.splitext(img_file)[0] + ".txt")
-            if os.path.exists(caption_file):
+            caption_file = self._caption_paths[img_file]
+            try:
                 os.remove(caption_file)
+            except FileNotFoundError:
+                pass
             
             # Update tracking
             if img_file in self.completed_files:
@@ -700,14 +1403,16 @@ class CaptionEditorApp:
             
             # Disable generate buttons during processing
             self.generate_btn.configure(state="disabled")
+            self.batch_btn.configure(state="disabled")
+            self.regenerate_btn.configure(state="disabled")
             
             # Force GUI update
             self.root.update_idletasks()
             
-            # Start processing thread for single image
+            # Start processing thread for single image, always asking the API for a fresh caption
             thread = threading.Thread(
-                target=self.process_single_image_thread,
-                args=(idx,)
+                target=self._run_jobs,
+                args=([img_file], self.all_images, self.build_prompt(), True)
             )
             thread.daemon = True
             thread.start()
@@ -718,101 +1423,178 @@ class CaptionEditorApp:
             messagebox.showerror("Error", error_msg)
             self.processing = False
             self.generate_btn.configure(state="normal")
-
-    def process_single_image_thread(self, idx):
-        """Process a single image in a background thread"""
-        try:
-            # Get image file from index
-            img_file = self.all_images[idx]
-            display_idx = idx + 1  # 1-based index for display
-            
-            print(f"\nProcessing [{display_idx}/{self.total_images}] {img_file}")
-            img_path = os.path.join(self.images_dir, img_file)
-            out_path = os.path.join(self.captions_dir, os.path.splitext(img_file)[0] + ".txt")
-            
-            # Update status
-            status_msg = f"Processing: {img_file} ({display_idx}/{self.total_images})"
-            self.caption_queue.put(("STATUS", status_msg))
-            
-            # Generate caption
-            caption = self.caption_image(img_path, display_idx, self.total_images)
-            if not caption or len(caption.strip()) == 0:
-                raise ValueError("Empty caption received")
-            
-            # Save to file
-            with open(out_path, 'w') as f:
-                f.write(caption)
-            print(f"💾 Saved caption for [{display_idx}/{self.total_images}] {img_file}")
-            
-            # Update GUI
-            self.caption_queue.put(("UPDATE_GUI", {
-                'img_file': img_file,
-                'caption': caption,
-                'completed_files': self.completed_files | {img_file},
-                'total': self.total_images
-            }))
-            
-        except Exception as e:
-            error_msg = f"❌ Failed to process image {display_idx}: {str(e)}"
-            print(error_msg)
-            self.caption_queue.put(("ERROR", error_msg))
-            
-        finally:
-            print("\nSingle image processing finished")
-            self.processing = False
-            self.caption_queue.put(("DONE", None))
+            self.batch_btn.configure(state="normal")
+            self.regenerate_btn.configure(state="normal")
 
     def _on_mousewheel(self, event):
-        """Handle mousewheel scrolling"""
-        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        """Handle mousewheel scrolling, coalescing bursts of wheel events into one scroll"""
+        # Sum raw deltas, precision touchpads send steps much smaller than one notch
+        self._pending_scroll -= event.delta
+        if not self._scroll_scheduled:
+            self._scroll_scheduled = True
+            self.root.after(16, self._flush_scroll)  # At most ~60 redraws per second
+
+    def _flush_scroll(self):
+        """Apply the wheel movement accumulated since the last flush, keeping the remainder"""
+        units = int(self._pending_scroll / 120)  # One notch is 120, truncated toward zero
+        if units:
+            self.canvas.yview_scroll(units, "units")
+        self._pending_scroll -= units * 120
+        self._scroll_scheduled = False
+
+    def _on_caption_modified(self, img_file):
+        """Remember rows the user has edited so saving can skip untouched widgets"""
+        widget = self.caption_widgets.get(img_file)
+        if widget is not None and widget.edit_modified():
+            self._dirty.add(img_file)
 
     def save_changes(self):
         """Save edited captions back to files"""
-        changes_made = False
-        for img_file, widget in self.caption_widgets.items():
-            current_text = widget.get('1.0', tk.END).strip()
-            if img_file in self.original_captions and current_text != self.original_captions[img_file]:
-                caption_file = os.path.join(self.captions_dir, os.path.splitext(img_file)[0] + ".txt")
-                with open(caption_file, 'w') as f:
-                    f.write(current_text)
-                self.original_captions[img_file] = current_text
-                changes_made = True
-        
-        if changes_made:
+        pending_writes = []
+        for img_file in self._dirty:
+            widget = self.caption_widgets.get(img_file)
+            if widget is not None:
+                widget.edit_modified(False)
+        
+        # Only rows that were edited and already have a caption file
+        for img_file in self._dirty & self.original_captions.keys():
+            widget = self.caption_widgets.get(img_file)
+            if widget is not None:
+                # Tk always appends exactly one newline, no need to scan for other whitespace
+                current_text = widget.get('1.0', tk.END).rstrip('\n')
+            else:
+                current_text = self._edited_captions[img_file]
+            if current_text != self.original_captions[img_file]:
+                pending_writes.append((img_file, current_text))
+        # Failed writes are put back below so their edits survive for another try
+        self._dirty.clear()
+        
+        # One open and one write syscall per file, no text-mode wrapper in between
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+        failures = []
+        for img_file, current_text in pending_writes:
+            try:
+                fd = os.open(self._caption_paths[img_file], flags, 0o644)
+                try:
+                    os.write(fd, current_text.encode('utf-8'))
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                failures.append(f"{img_file}: {e}")
+                self._dirty.add(img_file)
+                continue
+            # Only a caption that reached the disk counts as saved
+            self.original_captions[img_file] = current_text
+        
+        # Keep the text of unsaved rows that are off screen
+        for img_file in list(self._edited_captions):
+            if img_file not in self._dirty:
+                del self._edited_captions[img_file]
+        
+        if failures:
+            _log.error("%d caption files failed to save; first: %s", len(failures), failures[0])
+            messagebox.showerror("Error", f"Failed to save {len(failures)} caption files:\n" + "\n".join(failures[:10]))
+        elif pending_writes:
+            _log.info("Saved %d caption files", len(pending_writes))
             messagebox.showinfo("Success", "Changes saved successfully!")
         else:
             messagebox.showinfo("Info", "No changes to save")
 
     def export_zip(self):
         """Create a zip file containing all images and their captions"""
+        zip_name = filedialog.asksaveasfilename(
+            title="Export Dataset",
+            initialdir="Datasets",
+            defaultextension=".zip",
+            initialfile="dataset.zip",
+            filetypes=[("Zip files", "*.zip"), ("All files", "*.*")]
+        )
+        if not zip_name:  # User cancelled
+            return
+        
+        self.exporting = True
+        self.export_btn.configure(state="disabled")
+        if not self.processing:
+            self.progress_frame.pack(fill=tk.X, padx=10, pady=5)
+            self.progress_var.set(0)
+            self.status_label.config(text="Exporting...")
+        
+        # Snapshot on the Tk thread, the worker must not read state the GUI may change
+        images = list(self.all_images)
+        caption_paths = {img_file: self._caption_paths[img_file] for img_file in images}
+        thread = threading.Thread(
+            target=self.export_zip_thread,
+            args=(zip_name, images, caption_paths, self.list_captions(), dict(self.original_captions)),
+            daemon=True
+        )
+        thread.start()
+
+    def export_zip_thread(self, zip_name, all_images, caption_paths, caption_set, captions):
+        """Write the zip off the Tk thread and report progress through the queue"""
         try:
-            zip_name = filedialog.asksaveasfilename(
-                title="Export Dataset",
-                initialdir="Datasets",
-                defaultextension=".zip",
-                initialfile="dataset.zip",
-                filetypes=[("Zip files", "*.zip"), ("All files", "*.*")]
-            )
-            if not zip_name:  # User cancelled
-                return
+            total = len(all_images)
+            images = iter(all_images)
+            prefetched = deque()
             
-            with zipfile.ZipFile(zip_name, 'w') as zipf:
-                # Add images
-                for img_file in os.listdir(self.images_dir):
-                    if img_file.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
-                        img_path = os.path.join(self.images_dir, img_file)
-                        zipf.write(img_path, img_file)
-                        
-                        # Add corresponding caption
-                        caption_file = os.path.join(self.captions_dir, 
-                                                  os.path.splitext(img_file)[0] + ".txt")
-                        if os.path.exists(caption_file):
-                            zipf.write(caption_file, 
-                                     os.path.splitext(img_file)[0] + ".txt")
-            
-            messagebox.showinfo("Success", f"Dataset exported to {zip_name}")
+            def read_ahead(pool):
+                # Keep a bounded number of image reads in flight
+                while len(prefetched) < self.zip_prefetch:
+                    img_file = next(images, None)
+                    if img_file is None:
+                        return
+                    img_path = os.path.join(self.images_dir, img_file)
+                    # Images are already compressed, so store them as-is
+                    zinfo = zipfile.ZipInfo.from_file(img_path, img_file)
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                    future = None
+                    if zinfo.file_size <= self.zip_prefetch_limit:
+                        future = pool.submit(self._read_file, img_path)
+                    prefetched.append((img_file, img_path, zinfo, future))
+            
+            done = 0
+            last_post = 0.0
+            date_time = time.localtime()[:6]
+            with ThreadPoolExecutor(max_workers=self.zip_prefetch) as pool, \
+                 zipfile.ZipFile(zip_name, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zipf:
+                read_ahead(pool)
+                while prefetched:
+                    # ZipFile is not thread-safe, so only reads happen in the pool
+                    img_file, img_path, zinfo, future = prefetched.popleft()
+                    read_ahead(pool)
+                    if future is not None:
+                        zipf.writestr(zinfo, future.result())
+                    else:
+                        with open(img_path, 'rb', buffering=self.zip_buffer_size) as src, \
+                             zipf.open(zinfo, 'w') as dst:
+                            shutil.copyfileobj(src, dst, length=self.zip_buffer_size)
+                    
+                    # Captions are plain text and shrink well
+                    caption_file = caption_paths[img_file]
+                    caption_name = os.path.basename(caption_file)
+                    if img_file in captions:
+                        # Already in memory, no need to open the file again
+                        zinfo = zipfile.ZipInfo(caption_name, date_time=date_time)
+                        zinfo.compress_type = zipfile.ZIP_DEFLATED
+                        zipf.writestr(zinfo, captions[img_file].encode('utf-8'), compresslevel=6)
+                    elif caption_name in caption_set:
+                        zipf.write(caption_file, caption_name,
+                                   compress_type=zipfile.ZIP_DEFLATED, compresslevel=6)
+                    
+                    # Post progress at most every 50ms so the queue does not flood the GUI
+                    done += 1
+                    now = time.monotonic()
+                    if now - last_post >= 0.05:
+                        last_post = now
+                        self._post("EXPORT_PROGRESS", {'done': done, 'total': total})
+            
+            self._post("EXPORT_DONE", {'zip_name': zip_name, 'error': None})
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to create zip file: {e}")
+            self._post("EXPORT_DONE", {'zip_name': zip_name, 'error': e})
+
+    def _read_file(self, path):
+        """Read a whole file, used to prefetch export entries off the writer thread"""
+        with open(path, 'rb') as f:
+            return f.read()
 
     def clear_all_captions(self):
         """Clear all captions and reset the GUI"""
@@ -825,7 +1607,7 @@ class CaptionEditorApp:
             return
         
         try:
-            print("\n🧹 Clearing all captions and resetting interface...")
+            _log.info("Clearing all captions and resetting interface")
             
             # Stop any ongoing processing
             self.should_stop = True
@@ -836,64 +1618,64 @@ class CaptionEditorApp:
             self.completed_images = 0
             
             # Clear progress file
-            if os.path.exists(self.progress_file):
-                try:
-                    os.remove(self.progress_file)
-                    print("✓ Deleted progress file")
-                except Exception as e:
-                    print(f"❌ Error deleting progress file: {e}")
+            try:
+                os.remove(self.progress_file)
+                _log.info("Deleted progress file")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                _log.error("Error deleting progress file: %s", e)
             
-            # Clear all caption files and widgets
+            # Clear all caption files, collecting failures into one report
             caption_files_deleted = 0
+            failures = []
             for img_file in self.all_images:
-                # Clear caption file
-                caption_file = os.path.join(self.captions_dir, os.path.splitext(img_file)[0] + ".txt")
-                if os.path.exists(caption_file):
-                    try:
-                        os.remove(caption_file)
-                        caption_files_deleted += 1
-                    except Exception as e:
-                        print(f"❌ Error deleting {caption_file}: {e}")
-                
-                # Clear caption widget
-                if img_file in self.caption_widgets:
-                    widget = self.caption_widgets[img_file]
-                    widget.delete('1.0', tk.END)
-                    widget.update_idletasks()
+                try:
+                    os.unlink(self._caption_paths[img_file])
+                    caption_files_deleted += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    failures.append((img_file, e))
+            if failures:
+                _log.error("%d deletions failed; first: %s", len(failures), failures[0])
             
-            print(f"✓ Deleted {caption_files_deleted} caption files")
+            # Clear caption widgets, redrawing once at the end instead of per widget
+            for widget in self.caption_widgets.values():
+                widget.delete('1.0', tk.END)
+                widget.edit_modified(False)
+            
+            _log.info("Deleted %d caption files", caption_files_deleted)
             
             # Clear stored captions
             self.original_captions.clear()
+            self._edited_captions.clear()
+            self._dirty.clear()
             
             # Reset progress elements
             self.progress_var.set(0)
             self.status_label.config(text="")
             
-            # Hide progress frame if visible
-            if self.progress_frame.winfo_ismapped():
-                self.progress_frame.pack_forget()
+            # Hide progress frame, a no-op if it is not shown
+            self.progress_frame.pack_forget()
             
             # Reset active frame highlighting
-            if self.current_active_frame:
-                self.caption_frames[self.current_active_frame].configure(
-                    highlightcolor=self.INACTIVE_BORDER_COLOR,
-                    highlightbackground=self.INACTIVE_BORDER_COLOR
-                )
-                self.current_active_frame = None
+            self.clear_active_frame()
             
-            # Reset button
+            # Reset buttons
             self.generate_btn.configure(state="normal")
+            self.batch_btn.configure(state="normal")
+            self.regenerate_btn.configure(state="normal")
             
-            # Force GUI updates
+            # Single redraw for everything cleared above
             self.root.update_idletasks()
             
-            print("✨ Interface reset complete")
+            _log.info("Interface reset complete")
             messagebox.showinfo("Success", "All captions have been cleared and interface has been reset!")
             
         except Exception as e:
             error_msg = f"Error clearing captions: {e}"
-            print(f"❌ {error_msg}")
+            _log.error("%s", error_msg)
             messagebox.showerror("Error", error_msg)
 
 if __name__ == "__main__":